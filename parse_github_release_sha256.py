@@ -7,21 +7,52 @@ Example:
     python parse_github_release_sha256_gemini.py \\
         https://github.com/jetify-com/devbox/releases/tag/0.16.0 \\
         devbox.rb
+
+Checksums are cached under $XDG_CACHE_HOME/update-homebrew-c3po for 24
+hours; set UPDATE_HOMEBREW_C3PO_NO_CACHE=1 to ignore cached entries (e.g.
+after a release's assets were re-uploaded).
 """
 
+import functools
+import json
+import os
 import pathlib
 import re
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Iterable, Optional
 
 import requests
+from requests.adapters import HTTPAdapter
+
+_RELEASE_TAG_RE = re.compile(r"github\.com/([^/]+)/([^/]+)/releases/tag/([^/]+)")
+# "<sha256>  [*]<filename>" lines, matched directly on the raw response bytes
+_CHECKSUM_LINE_RE = re.compile(
+    rb"^[ \t]*([0-9a-fA-F]{64})[ \t]+\**(\S+)[ \t]*\r?$", re.MULTILINE
+)
+_URL_RE = re.compile(r'url\s+"([^"]+)"')
+_VERSION_RE = re.compile(r'^([ \t]*version\s+")[^"]+(")', re.MULTILINE)
+# A url line, any lines up to (but not past) the next url, then its sha256 line.
+_URL_SHA_RE = re.compile(
+    r'(url\s+"([^"]+)"[^\n]*\n'
+    r'(?:(?![^\n]*url\s+")(?![ \t]*sha256\s+")[^\n]*\n)*'
+    r'[ \t]*sha256\s+")([^"]+)(")'
+)
+
+# How long on-disk checksum cache entries stay fresh
+_CACHE_TTL_SECONDS = 24 * 60 * 60
+
+# Shared session so candidate downloads reuse pooled keep-alive connections
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=8))
 
 
 def parse_release_url(url: str) -> Optional[tuple[str, str, str]]:
     """
     Extract the owner/repo/tag triple from a GitHub release URL.
     """
-    match = re.search(r"github\.com/([^/]+)/([^/]+)/releases/tag/([^/]+)", url)
+    match = _RELEASE_TAG_RE.search(url)
     if not match:
         return None
     return match.group(1), match.group(2), match.group(3)
@@ -43,34 +74,75 @@ def candidate_checksum_urls(owner: str, repo: str, tag: str) -> Iterable[str]:
         yield f"{base}/{name}"
 
 
+def checksum_file_missing(url: str) -> bool:
+    """
+    Probe a candidate checksum URL with a HEAD request so missing files are
+    rejected without downloading a 404 page. Only a 404 counts as missing;
+    any other answer (including the redirect existing release assets reply
+    with, which is not followed) means the file should be downloaded.
+    """
+    resp = _SESSION.head(url, timeout=5, allow_redirects=False)
+    return resp.status_code == 404
+
+
 def parse_checksum_file(url: str) -> Dict[str, str]:
     """
     Download and parse a checksum file of the form:
         <sha256>  <filename>
     """
-    resp = requests.get(url, timeout=15)
+    resp = _SESSION.get(url, timeout=15)
     resp.raise_for_status()
 
-    results: Dict[str, str] = {}
-    for line in resp.text.splitlines():
-        line = line.strip()
-        if not line:
-            continue
+    return {
+        match.group(2).decode(): match.group(1).decode().lower()
+        for match in _CHECKSUM_LINE_RE.finditer(resp.content)
+    }
+
+
+def _cache_path(owner: str, repo: str, tag: str) -> pathlib.Path:
+    cache_home = os.environ.get("XDG_CACHE_HOME") or pathlib.Path.home() / ".cache"
+    cache_dir = pathlib.Path(cache_home) / "update-homebrew-c3po"
+    return cache_dir / owner / repo / f"{tag}.json"
+
+
+def _read_cached_checksums(path: pathlib.Path) -> Optional[Dict[str, str]]:
+    """
+    Return the checksums stored at path, or None if missing, stale, unreadable
+    or malformed. UPDATE_HOMEBREW_C3PO_NO_CACHE bypasses the cache entirely.
+    """
+    if os.environ.get("UPDATE_HOMEBREW_C3PO_NO_CACHE"):
+        return None
+    try:
+        if time.time() - os.path.getmtime(path) > _CACHE_TTL_SECONDS:
+            return None
+        with open(path) as fh:
+            checksums = json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+    if not checksums or not isinstance(checksums, dict):
+        return None
+    if not all(isinstance(k, str) and isinstance(v, str) for k, v in checksums.items()):
+        return None
+    return checksums
 
-        parts = line.split()
-        if len(parts) != 2:
-            continue
 
-        sha256, filename = parts
-        if re.fullmatch(r"[0-9a-fA-F]{64}", sha256):
-            results[filename.lstrip("*")] = sha256.lower()
-    return results
+def _write_cached_checksums(path: pathlib.Path, checksums: Dict[str, str]) -> None:
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(checksums))
+    except OSError:
+        pass  # caching is best-effort
 
 
+@functools.lru_cache(maxsize=128)
 def fetch_release_checksums(release_url: str) -> tuple[str, Dict[str, str]]:
     """
-    Try each candidate checksum URL until one succeeds and returns hashes.
-    Returns the release tag and its checksum mapping.
+    Probe every candidate checksum URL concurrently and download only the
+    ones that exist, keeping the first candidate (in priority order) that
+    returns hashes. Returns the release tag and its checksum mapping.
+
+    Results are memoized in-process and cached on disk for 24 hours.
     """
     parsed = parse_release_url(release_url)
     if not parsed:
@@ -81,15 +153,34 @@ def fetch_release_checksums(release_url: str) -> tuple[str, Dict[str, str]]:
 
     owner, repo, tag = parsed
 
+    cache_file = _cache_path(owner, repo, tag)
+    cached = _read_cached_checksums(cache_file)
+    if cached:
+        return tag, cached
+
     last_error: Optional[Exception] = None
-    for url in candidate_checksum_urls(owner, repo, tag):
-        try:
-            checksums = parse_checksum_file(url)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        probes = [
+            (url, pool.submit(checksum_file_missing, url))
+            for url in candidate_checksum_urls(owner, repo, tag)
+        ]
+        # The probes run concurrently, but are checked in candidate order so
+        # the preferred checksum file wins regardless of which answers first.
+        for url, probe in probes:
+            try:
+                if probe.result():
+                    continue
+            except Exception:  # noqa: BLE001 - probe failed, try the download
+                pass
+
+            try:
+                checksums = parse_checksum_file(url)
+            except Exception as exc:  # noqa: BLE001 - best-effort fallback
+                last_error = exc
+                continue
             if checksums:
+                _write_cached_checksums(cache_file, checksums)
                 return tag, checksums
-        except Exception as exc:  # noqa: BLE001 - best-effort fallback
-            last_error = exc
-            continue
 
     if last_error:
         raise last_error
@@ -104,48 +195,32 @@ def update_formula(path: pathlib.Path, version: str, checksums: Dict[str, str])
     Returns number of sha lines updated.
     """
     content = path.read_text()
-    lines = content.splitlines()
 
     # Update version line (first occurrence)
-    for idx, line in enumerate(lines):
-        if re.match(r"\s*version\s+\"[^\"]+\"", line):
-            lines[idx] = re.sub(r"\"[^\"]+\"", f"\"{version}\"", line, count=1)
-            break
-
-    updated = 0
-    i = 0
-    while i < len(lines):
-        url_match = re.search(r'url\s+"([^"]+)"', lines[i])
-        if not url_match:
-            i += 1
-            continue
-
-        asset_url = url_match.group(1)
-        expanded_url = asset_url.replace("#{version}", version)
-        filename = expanded_url.rsplit("/", 1)[-1]
+    content = _VERSION_RE.sub(
+        lambda m: f"{m.group(1)}{version}{m.group(2)}", content, count=1
+    )
+
+    # Rewrite every url/sha256 pair in a single pass over the file
+    replaced_urls = set()
+
+    def replace_sha(match: "re.Match[str]") -> str:
+        expanded_url = match.group(2).replace("#{version}", version)
+        filename = expanded_url.rpartition("/")[2]
         if filename not in checksums:
             raise KeyError(f"Checksum for {filename} not found in checksum file.")
+        replaced_urls.add(match.start())
+        return f"{match.group(1)}{checksums[filename]}{match.group(4)}"
 
-        # find the sha256 line that follows this url (before the next url)
-        sha_idx: Optional[int] = None
-        for j in range(i + 1, len(lines)):
-            if re.search(r'url\s+"', lines[j]):
-                break
-            if re.match(r"\s*sha256\s+\"[^\"]+\"", lines[j]):
-                sha_idx = j
-                break
+    new_content = _URL_SHA_RE.sub(replace_sha, content)
 
-        if sha_idx is None:
+    for url_match in _URL_RE.finditer(content):
+        if url_match.start() not in replaced_urls:
+            filename = url_match.group(1).replace("#{version}", version).rpartition("/")[2]
             raise RuntimeError(f"No sha256 line found after url for {filename}.")
 
-        indent = re.match(r"^(\s*)", lines[sha_idx]).group(1)
-        lines[sha_idx] = f'{indent}sha256 "{checksums[filename]}"'
-        updated += 1
-        i = sha_idx
-        i += 1
-
-    path.write_text("\n".join(lines) + "\n")
-    return updated
+    path.write_text(new_content)
+    return len(replaced_urls)
 
 
 def main() -> None:
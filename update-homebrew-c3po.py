@@ -40,9 +40,14 @@ REQUIREMENTS:
     Install all requirements:
     pip install requests beautifulsoup4
 
+ENVIRONMENT:
+    GITHUB_TOKEN    Optional. GitHub token used to authenticate API requests
+                    and raise the API rate limit.
+
 OUTPUT:
     The script will:
-    1. Fetch the GitHub release page
+    1. Fetch the release metadata from the GitHub API (falling back to
+       scraping the release page if the API is unavailable)
     2. Extract the version number from the URL
     3. Extract the app name from the repository URL (or use provided --app-name)
     4. Download and parse the checksums file
@@ -69,10 +74,82 @@ AUTHOR:
 """
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+import pathlib
 import re
+import shutil
 import sys
 import os
+import tempfile
+
+# Precompiled patterns used while parsing release pages and formula files
+_APP_NAME_RE = re.compile(r'github\.com/[^/]+/([^/]+)/')
+_RELEASE_TAG_RE = re.compile(r'github\.com/([^/]+)/([^/]+)/releases/tag/([^/?#]+)')
+_VERSION_TAG_RE = re.compile(r'/tag/v?(\d+\.\d+\.\d+)')
+# Link to a checksums release asset (same names as is_checksums_filename)
+_CHECKSUMS_HREF_RE = re.compile(
+    rb'href="((?:https://github\.com)?/[^"]*/(?:releases/download|assets)/(?:[^"]*/)?'
+    rb'(?:[^"/]*(?:checksum|sha256)[^"/]*|[^"/]*sums\.txt))"',
+    re.IGNORECASE
+)
+_FORMULA_VERSION_RE = re.compile(r'version\s+"[\d.]+"')
+# Platform identifiers used in release asset names (<app>_<version>_<platform>.tar.gz)
+PLATFORMS = (
+    'darwin_amd64',
+    'darwin_arm64',
+    'linux_386',
+    'linux_amd64',
+    'linux_arm64',
+    'linux_armv7l',
+)
+
+# url "..._<platform>.tar.gz" of any platform followed by its sha256 line
+_PLATFORM_SHA_RE = re.compile(
+    rf'(url\s+"[^"]*_(?P<platform>{"|".join(map(re.escape, PLATFORMS))})\.tar\.gz"[^)\n]*\))'
+    r'\s*\n\s*sha256\s+"[a-fA-F0-9]+"'
+)
+
+GITHUB_API_URL = 'https://api.github.com'
+REQUEST_TIMEOUT = 15
+# Checksums file name downloaded speculatively while the release is looked up
+DEFAULT_CHECKSUMS_FILENAME = 'checksums.txt'
+
+_RELEASE_NOTES_RES = [
+    re.compile(
+        r'([a-zA-Z0-9._-]+\.(?:tar\.gz|zip|tar\.xz|exe|dmg|deb|rpm))\s*[:\s]+\s*([a-fA-F0-9]{64})',
+        re.IGNORECASE | re.MULTILINE
+    ),
+    re.compile(
+        r'([a-fA-F0-9]{64})\s+([a-zA-Z0-9._-]+\.(?:tar\.gz|zip|tar\.xz|exe|dmg|deb|rpm))',
+        re.IGNORECASE | re.MULTILINE
+    ),
+]
+
+# Shared session so the API, release page and checksums downloads reuse
+# pooled keep-alive connections instead of a new TLS handshake per request
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=4))
+
+
+def is_sha256_hex(value):
+    """
+    Check whether a string is a 64-character hexadecimal SHA256 digest.
+
+    Args:
+        value: String to check
+
+    Returns:
+        bool: True if the string is a valid SHA256 hex digest
+    """
+    if len(value) != 64:
+        return False
+    try:
+        bytes.fromhex(value)
+    except ValueError:
+        return False
+    return True
+
 
 def extract_app_name_from_url(url):
     """
@@ -85,15 +162,140 @@ def extract_app_name_from_url(url):
         str: Application name
     """
     # Extract repo name from URL like https://github.com/owner/repo/releases/...
-    match = re.search(r'github\.com/[^/]+/([^/]+)/', url)
+    match = _APP_NAME_RE.search(url)
     if match:
         return match.group(1)
     return None
 
 
+def is_checksums_filename(filename):
+    """
+    Check whether a release asset name looks like a checksums file.
+
+    Args:
+        filename: Asset file name
+
+    Returns:
+        bool: True if the asset is likely to contain SHA256 checksums
+    """
+    lower = filename.lower()
+    return 'checksum' in lower or 'sha256' in lower or filename.endswith('sums.txt')
+
+
+def fetch_release_info(owner, repo, tag):
+    """
+    Fetch release metadata (assets and release notes) from the GitHub REST API.
+
+    The release notes are requested as rendered plain text ('body_text')
+    rather than raw Markdown, so tables and inline code read the same as on
+    the release page.
+
+    Set the GITHUB_TOKEN environment variable to authenticate the request and
+    avoid the low rate limit applied to anonymous API calls.
+
+    Args:
+        owner: Repository owner
+        repo: Repository name
+        tag: Release tag
+
+    Returns:
+        dict: Release JSON as returned by the API
+    """
+    headers = {'Accept': 'application/vnd.github.text+json'}
+    token = os.environ.get('GITHUB_TOKEN')
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+
+    api_url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/releases/tags/{tag}"
+    print(f"Fetching release metadata: {api_url}")
+    response = _SESSION.get(api_url, headers=headers, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+
+def scrape_release_page(url):
+    """
+    Scrape the HTML release page for the checksums file link.
+
+    Only used when the GitHub API is unavailable (e.g. rate limited).
+
+    Args:
+        url: URL of the GitHub release page
+
+    Returns:
+        tuple: (checksums file URL or None, raw page HTML as bytes)
+    """
+    print(f"Fetching release page: {url}")
+    response = _SESSION.get(url, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+
+    # Scan the raw bytes for the checksums asset link rather than building a DOM
+    checksums_url = None
+    match = _CHECKSUMS_HREF_RE.search(response.content)
+    if match:
+        href = match.group(1).decode()
+        checksums_url = f"https://github.com{href}" if href.startswith('/') else href
+
+    return checksums_url, response.content
+
+
+def extract_release_notes(page_html):
+    """
+    Extract the release notes text from a scraped release page.
+
+    Building the DOM is the expensive part of the HTML fallback, so this is
+    only called when no checksums file could be used.
+
+    Args:
+        page_html: Raw HTML of the GitHub release page
+
+    Returns:
+        str: Release notes text, or an empty string if not found
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(page_html, 'html.parser')
+    release_body = soup.find('div', {'class': 'markdown-body'})
+    return release_body.get_text() if release_body else ''
+
+
+def fetch_checksums_file(checksums_url):
+    """
+    Download and parse a checksums file.
+
+    Args:
+        checksums_url: URL of a file with lines of the form <hash>  <filename>
+
+    Returns:
+        dict: Mapping of filename to SHA256 hash
+    """
+    checksum_response = _SESSION.get(checksums_url, timeout=REQUEST_TIMEOUT)
+    checksum_response.raise_for_status()
+
+    results = {}
+    for line in checksum_response.text.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+
+        # Try different formats
+        parts = line.split(None, 1)
+        if len(parts) == 2:
+            if is_sha256_hex(parts[0]):
+                sha256_hash = parts[0].lower()
+                filename = parts[1].strip('*').strip()
+                results[filename] = sha256_hash
+    return results
+
+
 def parse_release_page(url, app_name=None):
     """
-    Parse GitHub release page and extract version and SHA256 hashes for each file.
+    Parse GitHub release and extract version and SHA256 hashes for each file.
+
+    Release assets and notes are read from the GitHub API; the HTML release
+    page is only scraped if the API request fails. The conventional
+    checksums file is downloaded concurrently with the release lookup so the
+    common case costs a single round trip.
 
     Args:
         url: URL of the GitHub release page
@@ -102,10 +304,8 @@ def parse_release_page(url, app_name=None):
     Returns:
         tuple: (version, app_name, dict of filename to SHA256 hash)
     """
-    print(f"Fetching release page: {url}")
-
     # Extract version from URL
-    version_match = re.search(r'/tag/v?(\d+\.\d+\.\d+)', url)
+    version_match = _VERSION_TAG_RE.search(url)
     if not version_match:
         raise ValueError(f"Could not extract version from URL: {url}")
     version = version_match.group(1)
@@ -117,72 +317,62 @@ def parse_release_page(url, app_name=None):
             raise ValueError(f"Could not extract app name from URL: {url}")
         print(f"Detected app name: {app_name}")
 
-    # Fetch the page
-    response = requests.get(url)
-    response.raise_for_status()
-
-    # Parse HTML
-    soup = BeautifulSoup(response.text, 'html.parser')
+    release_match = _RELEASE_TAG_RE.search(url)
+    if not release_match:
+        raise ValueError(f"Could not extract owner/repo/tag from URL: {url}")
+    owner, repo, tag = release_match.groups()
 
     results = {}
+    speculative_url = (
+        f"https://github.com/{owner}/{repo}/releases/download/{tag}/{DEFAULT_CHECKSUMS_FILENAME}"
+    )
 
-    # Method 1: Look for SHA256 checksums file
-    asset_links = soup.find_all('a', href=re.compile(r'/(releases/download|assets)/'))
+    release_notes = ''
+    release_page = None
 
-    checksums_url = None
-    for link in asset_links:
-        href = link.get('href', '')
-        filename = href.split('/')[-1]
-        if 'checksum' in filename.lower() or 'sha256' in filename.lower() or filename.endswith('sums.txt'):
-            checksums_url = f"https://github.com{href}" if href.startswith('/') else href
-            break
-
-    if checksums_url:
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        speculative_future = pool.submit(fetch_checksums_file, speculative_url)
+
+        # Locate the checksums asset and release notes
         try:
-            print(f"Found checksums file: {checksums_url}")
-            checksum_response = requests.get(checksums_url)
-            checksum_response.raise_for_status()
-
-            # Parse checksums file (format: <hash>  <filename>)
-            for line in checksum_response.text.split('\n'):
-                line = line.strip()
-                if not line:
-                    continue
-
-                # Try different formats
-                parts = re.split(r'\s+', line, 1)
-                if len(parts) == 2:
-                    if len(parts[0]) == 64 and all(c in '0123456789abcdefABCDEF' for c in parts[0]):
-                        sha256_hash = parts[0].lower()
-                        filename = parts[1].strip('*').strip()
-                        results[filename] = sha256_hash
-        except Exception as e:
-            print(f"Warning: Could not fetch checksums file: {e}")
+            release = pool.submit(fetch_release_info, owner, repo, tag).result()
+            checksums_url = None
+            for asset in release.get('assets', []):
+                if is_checksums_filename(asset.get('name', '')):
+                    checksums_url = asset['browser_download_url']
+                    break
+            release_notes = release.get('body_text') or ''
+        except requests.RequestException as e:
+            print(f"Warning: GitHub API request failed ({e}), falling back to the release page")
+            checksums_url, release_page = scrape_release_page(url)
+
+        # Method 1: Look for SHA256 checksums file
+        if checksums_url:
+            try:
+                print(f"Found checksums file: {checksums_url}")
+                if checksums_url == speculative_url:
+                    results = speculative_future.result()
+                else:
+                    results = fetch_checksums_file(checksums_url)
+            except Exception as e:
+                print(f"Warning: Could not fetch checksums file: {e}")
 
     # Method 2: Look for SHA256 in release notes if checksums file not found
-    if not results:
-        release_body = soup.find('div', {'class': 'markdown-body'})
-
-        if release_body:
-            text = release_body.get_text()
-
-            patterns = [
-                r'([a-zA-Z0-9._-]+\.(?:tar\.gz|zip|tar\.xz|exe|dmg|deb|rpm))\s*[:\s]+\s*([a-fA-F0-9]{64})',
-                r'([a-fA-F0-9]{64})\s+([a-zA-Z0-9._-]+\.(?:tar\.gz|zip|tar\.xz|exe|dmg|deb|rpm))',
-            ]
-
-            for pattern in patterns:
-                matches = re.finditer(pattern, text, re.IGNORECASE | re.MULTILINE)
-                for match in matches:
-                    groups = match.groups()
-                    if len(groups[0]) == 64 and all(c in '0123456789abcdefABCDEF' for c in groups[0]):
-                        sha256_hash = groups[0].lower()
-                        filename = groups[1]
-                    else:
-                        filename = groups[0]
-                        sha256_hash = groups[1].lower()
-
-                    results[filename] = sha256_hash
+    if not results and release_page is not None:
+        release_notes = extract_release_notes(release_page)
+
+    if not results and release_notes:
+        for pattern in _RELEASE_NOTES_RES:
+            for match in pattern.finditer(release_notes):
+                groups = match.groups()
+                if is_sha256_hex(groups[0]):
+                    sha256_hash = groups[0].lower()
+                    filename = groups[1]
+                else:
+                    filename = groups[0]
+                    sha256_hash = groups[1].lower()
+
+                results[filename] = sha256_hash
 
     return version, app_name, results
 
@@ -198,42 +388,46 @@ def update_formula_file(version, app_name, sha256_hashes, rb_file_path):
         rb_file_path: Path to formula .rb file
     """
     # Read the current file
-    with open(rb_file_path, 'r') as f:
-        content = f.read()
+    # Resolve symlinks so a linked formula (e.g. in a tap checkout) is updated in place
+    formula_path = pathlib.Path(rb_file_path).resolve()
+    content = formula_path.read_text()
 
     # Update version
-    content = re.sub(
-        r'version\s+"[\d.]+"',
-        f'version "{version}"',
-        content
-    )
+    content = _FORMULA_VERSION_RE.sub(f'version "{version}"', content)
 
-    # Map platform identifiers to filenames
-    platform_map = {
-        'darwin_amd64': f'{app_name}_{version}_darwin_amd64.tar.gz',
-        'darwin_arm64': f'{app_name}_{version}_darwin_arm64.tar.gz',
-        'linux_386': f'{app_name}_{version}_linux_386.tar.gz',
-        'linux_amd64': f'{app_name}_{version}_linux_amd64.tar.gz',
-        'linux_arm64': f'{app_name}_{version}_linux_arm64.tar.gz',
-        'linux_armv7l': f'{app_name}_{version}_linux_armv7l.tar.gz',
-    }
-
-    # Update SHA256 hashes
-    for platform, filename in platform_map.items():
+    # Map platform identifiers to their SHA256 hashes
+    prefix = f'{app_name}_{version}_'
+    platform_sha = {}
+    for platform in PLATFORMS:
+        filename = f'{prefix}{platform}.tar.gz'
         if filename in sha256_hashes:
-            sha256 = sha256_hashes[filename]
-            # Find and replace the sha256 line after the corresponding platform URL
-            # Look for pattern: url "..._<platform>.tar.gz" followed by sha256 line
-            pattern = rf'(url\s+"[^"]*_{platform}\.tar\.gz"[^)]*\))\s*\n\s*sha256\s+"[a-fA-F0-9]+"'
-            replacement = rf'\1\n    sha256 "{sha256}"'
-            content = re.sub(pattern, replacement, content)
-            print(f"Updated SHA256 for {platform}: {sha256}")
+            platform_sha[platform] = sha256_hashes[filename]
+            print(f"Updated SHA256 for {platform}: {platform_sha[platform]}")
         else:
             print(f"Warning: No SHA256 found for {filename}")
 
-    # Write the updated content back
-    with open(rb_file_path, 'w') as f:
-        f.write(content)
+    def replace_sha256(match):
+        sha256 = platform_sha.get(match.group('platform'))
+        if not sha256:
+            return match.group(0)
+        return f'{match.group(1)}\n    sha256 "{sha256}"'
+
+    # Update SHA256 hashes
+    content = _PLATFORM_SHA_RE.sub(replace_sha256, content)
+
+    # Write the updated content to a temporary file and atomically swap it in,
+    # so an interrupted run never leaves a truncated formula behind
+    tmp_file = tempfile.NamedTemporaryFile(
+        'w', dir=formula_path.parent, prefix=formula_path.name, suffix='.tmp', delete=False
+    )
+    try:
+        with tmp_file:
+            tmp_file.write(content)
+        shutil.copymode(formula_path, tmp_file.name)
+        os.replace(tmp_file.name, formula_path)
+    except BaseException:
+        os.unlink(tmp_file.name)
+        raise
 
     print(f"\nSuccessfully updated {rb_file_path}")
 